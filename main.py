@@ -2,31 +2,74 @@
 # More rudimentary, it's just a simple CRUD operation on
 # csv that's highly optimized by personal preference.
 
-import pandas as pd
-import numpy as np
+# pandas, numpy and tabulate take a good while to import, so they're only
+# imported inside the functions that need them. That way commands like
+# new and help don't pay for them.
 import os
 import sys
-from datetime import datetime
-from tabulate import tabulate
+import csv
+from datetime import date
 import sqlite3
 from sqlite3 import Error
 
+# Prints a dataframe (plus any extra rows) as a psql-style table.
+# tabulate gets plain tuples, which it goes through a lot faster
+# than it goes through a DataFrame.
+def print_table(dataframe,extra_rows=()):
+    from tabulate import tabulate
+    rows = list(dataframe.itertuples(index=False,name=None))
+    rows.extend(tuple(row) for row in extra_rows)
+    print(tabulate(rows,headers=list(dataframe.columns),tablefmt="psql"))
+
 # A singleton class for an SQLite connection. Returns a Connection
 # object when create_connection is called. The same object is returned
 # on subsequent create_connection calls.
+# The connection is in autocommit mode, transactions are opened
+# explicitly with BEGIN wherever we write in bulk.
 class Sqlite3Connector:
     def __new__(cls):
         if not hasattr(cls,'instance'):
             cls.instance = super(Sqlite3Connector,cls).__new__(cls)
         return cls.instance
     
-    def create_connection():
-        connection = None
-        try:
-            connection = sqlite3.connect("applications.sqlite")
-        except Error as e:
-            print(f"The error '{e}' occurred!")
-        return connection
+    # The connection itself is cached on the class, so everyone shares one handle.
+    # WAL mode with synchronous=NORMAL means a commit no longer has to wait
+    # on a full fsync of the database file.
+    @classmethod
+    def create_connection(cls):
+        if getattr(cls,'connection',None) is None:
+            try:
+                cls.connection = sqlite3.connect("applications.sqlite",isolation_level=None)
+                cls.connection.execute("PRAGMA journal_mode=WAL")
+                cls.connection.execute("PRAGMA synchronous=NORMAL")
+            except Error as e:
+                cls.connection = None
+                print(f"The error '{e}' occurred!")
+        return cls.connection
+
+    # Closes the shared connection, the next create_connection opens a fresh one.
+    @classmethod
+    def close_connection(cls):
+        if getattr(cls,'connection',None) is not None:
+            cls.connection.close()
+            cls.connection = None
+
+    # Whether the Jobs table is already there.
+    @staticmethod
+    def has_table(connection):
+        return connection.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='Jobs'").fetchone() is not None
+
+    # Creates the Jobs table, the same layout pandas' to_sql used to make.
+    # Fails if the table is already there.
+    @staticmethod
+    def create_table(connection):
+        connection.execute('CREATE TABLE "Jobs" ("Company" TEXT, "Status" TEXT, "Quantity" INTEGER, "Date" TEXT)')
+
+    # Every query we run filters on Company, and quantity updates on Company
+    # and Date, so one composite index covers all of them.
+    @staticmethod
+    def create_indexes(connection):
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_jobs_company_date ON Jobs(Company,Date)")
 
 
 # A bunch of one-off command line arg functions.
@@ -34,52 +77,95 @@ class AdminTools:
 
     # A one-time initialization when the user passes the new arg.
     # Fails if the CSV file is already present.
+    # It's just a header line, so there's no need for pandas here.
     def initialize_document(self):
         columns = ['Company','Status','Quantity','Date']
-        dataframe = pd.DataFrame(columns=columns)
         if 'applications.csv' in os.listdir():
             print("Initialization failed, applications.csv is currently already initialized.")
         else:
-            dataframe.to_csv('applications.csv',index=False)
+            with open('applications.csv','w',newline='') as csv_file:
+                csv.writer(csv_file,lineterminator='\n').writerow(columns)
     
     # A cleanup in case the user feels like there's way too many rows
     # and calls the clean arg.
     # By design decisions, we've made it so only applications on the same
     # day to the same company get aggregated, because otherwise, it leads
     # to a dishonest job count. If the user wants to flatten, they can do so here.
+    # The file is read a chunk at a time and each chunk gets condensed and folded
+    # into the running result right away, so only one chunk plus the condensed
+    # groups ever sit in memory. Sums of sums and maxes of maxes come out the
+    # same, so folding chunk by chunk gives the same groups as one big pass.
     def aggregate(self):
-        dataframe = pd.read_csv('applications.csv')
-        print("Condensing",dataframe.shape[0],"rows of input data.")
-        dataframe = dataframe.groupby(['Company','Status'],as_index=False).agg({'Quantity':np.sum,'Date':np.max})
-        dataframe = dataframe.sort_values(by='Date')
+        import pandas as pd
+        row_count = 0
+        dataframe = None
+        with pd.read_csv('applications.csv',dtype={'Quantity':Database.DTYPES['Quantity']},chunksize=1_000_000) as chunks:
+            for chunk in chunks:
+                # Dates get parsed up front, so the max and the sort below work on
+                # plain datetime64 values instead of comparing strings. This raises
+                # on a malformed date, where parse_dates would leave strings behind.
+                chunk['Date'] = pd.to_datetime(chunk['Date'],format="%Y-%m-%d %H:%M:%S",cache=True)
+                row_count += chunk.shape[0]
+                condensed = self.condense(chunk)
+                if dataframe is None:
+                    dataframe = condensed
+                else:
+                    dataframe = self.condense(pd.concat([dataframe,condensed],ignore_index=True))
+        print("Condensing",row_count,"rows of input data.")
+        # The sort takes every column into a fresh array anyway, so what gets
+        # written out is contiguous per column without an extra copy.
+        dataframe = dataframe.sort_values(by='Date',kind='mergesort')
         print("Condensation complete! Data condensed to",dataframe.shape[0],"rows!")
-        dataframe.to_csv("applications.csv",index=False)
+        dataframe.to_csv("applications.csv",index=False,date_format="%Y-%m-%d %H:%M:%S")
+
+    # One row per company and status, with the total quantity and the latest date.
+    # String aggregations go through pandas' own groupby kernels. The groups
+    # get sorted by date afterwards, so there's no point sorting them by key.
+    def condense(self,dataframe):
+        return dataframe.groupby(['Company','Status'],as_index=False,sort=False).agg(Quantity=('Quantity','sum'),Date=('Date','max'))
     
     # Always called after aggregate. This is the function that makes an SQLite database
     # from the CSV file. Note that the CSV file is necessary in order to make a DB.
     # Fails if a database is already present.
+    # The CSV is read in chunks so a big file never has to fit in memory at once,
+    # and each chunk goes in with a single executemany over plain tuples.
     def transpile(self):
-        dataframe = pd.read_csv('applications.csv')
+        import pandas as pd
         connection = Sqlite3Connector.create_connection()
         try:
-            dataframe.to_sql("Jobs",connection,if_exists='fail',index = False)
+            if Sqlite3Connector.has_table(connection):
+                print("Write unsuccessful, a SQLite3 database file already exists in this directory. Delete to proceed.")
+                return
+            # One transaction for the whole load instead of one per row.
+            connection.execute("BEGIN")
+            try:
+                Sqlite3Connector.create_table(connection)
+                for chunk in pd.read_csv('applications.csv',chunksize=100_000):
+                    rows = chunk[['Company','Status','Quantity','Date']].itertuples(index=False,name=None)
+                    connection.executemany(Database.INSERT_QUERY,rows)
+                Sqlite3Connector.create_indexes(connection)
+                connection.commit()
+            except BaseException:
+                # Don't leave half a table behind.
+                connection.rollback()
+                raise
             print("Write successful! Database created: applications.sqlite.")
-            test_sql_write = pd.read_sql_query("SELECT * FROM Jobs",connection)
+            test_sql_write = pd.read_sql_query("SELECT * FROM Jobs LIMIT 5",connection)
             print("Testing write by printing a small sample of data:")
-            print(tabulate(test_sql_write.head(),headers='keys',tablefmt="psql",showindex=False))
-        except ValueError:
-            print("Write unsuccessful, a SQLite3 database file already exists in this directory. Delete to proceed.")
-        connection.close()
+            print_table(test_sql_write)
+        finally:
+            Sqlite3Connector.close_connection()
 
     # Called if you want to revert from an SQLite database.
     def untranspile(self):
+        import pandas as pd
         connection = Sqlite3Connector.create_connection()
         dataframe = pd.read_sql_query("SELECT * FROM Jobs",connection)
         print("Extracted data! Sample:")
-        print(dataframe.head)
-        for i in dataframe.index:
-            dataframe.loc[i,'Date'] = pd.to_datetime(dataframe.loc[i,'Date'],format="%Y-%m-%d %H:%M:%S")
-        dataframe.to_csv("applications.csv",index=False)
+        print_table(dataframe.head())
+        dataframe['Date'] = pd.to_datetime(dataframe['Date'],format="%Y-%m-%d %H:%M:%S",cache=True)
+        dataframe.to_csv("applications.csv",index=False,date_format="%Y-%m-%d %H:%M:%S")
+        Sqlite3Connector.close_connection()
         print("Write successful!")
     # When the user uses the help arg or enters an arg that's not in the list
     # of args, print this out.
@@ -94,6 +180,20 @@ class AdminTools:
 
 # The operator class, singleton.
 class Database:
+    # How many new rows get buffered before they're written out.
+    FLUSH_EVERY = 10
+    # Column types, handed to the readers so they don't have to guess.
+    # Company names and statuses repeat a lot, so they're stored as categories.
+    # Quantity stays int64: narrower types silently wrap large values on read.
+    DTYPES = {'Company':'category','Status':'category','Quantity':'int64'}
+    # The SQLite statements, kept as fixed strings so sqlite3's statement cache
+    # gets a hit every time instead of compiling a new query per call.
+    INCREMENT_QUERY = "UPDATE Jobs SET Quantity = Quantity + ? WHERE Company = ? AND Date = ?"
+    STATUS_QUERY = "UPDATE Jobs SET Status = ? WHERE Company = ?"
+    RENAME_QUERY = "UPDATE Jobs SET Company = ? WHERE Company = ?"
+    INSERT_QUERY = "INSERT INTO Jobs (Company,Status,Quantity,Date) VALUES (?,?,?,?)"
+    SEARCH_QUERY = "SELECT Company,Status,Quantity,Date FROM Jobs WHERE Company = ?"
+
     # Need to enforce a singleton on the database,
     # since the dataframe it holds must be consistent across
     # the subsystem classes.
@@ -105,25 +205,58 @@ class Database:
     # Initializes the dataframe from the CSV file or the SQLite database.
     # In case of an SQLite database, connects to it using SqliteConnector.create_connection().
     # Also handles date formatting so that date comparisons occur the right way.
+    # Every subsystem constructs the Database, but since they all get the same
+    # instance, only the first construction actually loads anything.
     def __init__(self,type):
+        if hasattr(self,'_frame'):
+            return
+        import pandas as pd
+        import numpy as np
         self.connection = None
         self.jobcount_today = None
         self.total_jobcount = None
-        self.new_entries = pd.DataFrame(columns = ['Company','Status','Quantity','Date'])
+        # New rows are buffered here and written out in bulk by flush().
+        self._pending = []
+        # Changes made since the last flush. For SQLite they all sit in one
+        # open transaction, for CSV they mean the file needs a rewrite.
+        self._uncommitted = 0
+        self._rewrite = False
         self.type = type
-        self.date = pd.to_datetime(datetime.now().strftime('%Y-%m-%d'),format="%Y-%m-%d")
+        self.date = pd.Timestamp(date.today())
+        # The same date as a raw numpy scalar, for comparing against the Date
+        # column's datetime64 values directly.
+        self._today = np.datetime64(date.today())
+        # Today's date the way it's stored in the data file.
+        self.date_string = self.date.strftime("%Y-%m-%d %H:%M:%S")
         if self.is_csv(type):
-            self.dataframe = pd.read_csv('applications.csv')
-            for i in self.dataframe.index:
-                self.dataframe.loc[i,'Date'] = pd.to_datetime(self.dataframe.loc[i,'Date'],format="%Y-%m-%d %H:%M:%S")
+            dataframe = pd.read_csv('applications.csv',dtype=self.DTYPES)
+            # Kept open for the whole session, new rows get written straight to it.
+            self._csv_file = open('applications.csv','a',newline='',buffering=1<<16)
+            self._csv_writer = csv.writer(self._csv_file,lineterminator='\n')
         else:
             self.connection = Sqlite3Connector.create_connection()
-            self.dataframe = pd.read_sql_query("SELECT * FROM Jobs",self.connection)
-            for i in self.dataframe.index:
-                self.dataframe.loc[i,'Date'] = pd.to_datetime(self.dataframe.loc[i,'Date'],format="%Y-%m-%d %H:%M:%S")
-        todays_data = self.dataframe[self.dataframe['Date'] == self.date]
-        self.jobcount_today = todays_data['Quantity'].sum()
-        self.total_jobcount = self.dataframe['Quantity'].sum() - self.jobcount_today
+            Sqlite3Connector.create_indexes(self.connection)
+            dataframe = pd.read_sql_query("SELECT * FROM Jobs",self.connection,dtype=self.DTYPES)
+        # Not parse_dates: that quietly leaves the column as strings if a single
+        # cell is off, and then no date comparison would ever match. This raises.
+        dataframe['Date'] = pd.to_datetime(dataframe['Date'],format="%Y-%m-%d %H:%M:%S",cache=True)
+        # The frame can hold more rows than it has, see reserve().
+        self._frame = dataframe
+        self._size = len(dataframe)
+        # Column positions, for scalar reads/writes through iat.
+        self._company_col = dataframe.columns.get_loc('Company')
+        self._status_col = dataframe.columns.get_loc('Status')
+        self._quantity_col = dataframe.columns.get_loc('Quantity')
+        # Company -> row positions, so lookups don't need to scan the whole column.
+        self._by_company = {company: rows.tolist() for company,rows in self.dataframe.groupby('Company',sort=False).indices.items()}
+        # Today's rows and both counts are worked out once here and then kept
+        # up to date as entries come in, instead of rescanning on every prompt.
+        # This works on the raw numpy arrays, so there's no pandas indexing in between.
+        todays_mask = dataframe['Date'].to_numpy() == self._today
+        quantities = dataframe['Quantity'].to_numpy()
+        self._today_rows = np.flatnonzero(todays_mask).tolist()
+        self.jobcount_today = int(quantities.sum(where=todays_mask,dtype=np.int64))
+        self.total_jobcount = int(quantities.sum(dtype=np.int64)) - self.jobcount_today
     # This checks whether the user passed the 
     # csv arg or the sql arg. Important to ensure
     # dual functionality.
@@ -133,82 +266,167 @@ class Database:
         else:
             return False
 
-    # Regularly commits entries to the data file, whether it's SQLite or CSV.
-    # In case of CSV, the "replace" flag means a simple append operation, otherwise
-    # it means we changed status or something (which cannot be done on a single-row
-    # basis since CSV is simply a flat file).
+    # The rows we actually have. Anything past them is spare room for new rows.
+    # Writes have to go to self._frame, this is only a view for reading.
+    @property
+    def dataframe(self):
+        return self._frame.iloc[:self._size]
+
+    # Makes sure the frame has space for this many more rows. When it runs out,
+    # the capacity doubles, so new rows get written into place and the frame
+    # is only copied every once in a while instead of on every flush.
+    def reserve(self,rows):
+        needed = self._size + rows
+        if needed <= len(self._frame):
+            return
+        frame = self._frame.reindex(range(max(needed,2*len(self._frame),16)))
+        # Spare rows would be NaN otherwise, and that doesn't fit an integer column.
+        frame['Quantity'] = frame['Quantity'].fillna(0).astype(self.DTYPES['Quantity'])
+        self._frame = frame
+
+    # Categorical columns only accept values they already know about,
+    # so new companies/statuses have to be registered before they're written.
+    def add_categories(self,column,values):
+        known = self._frame[column].cat.categories
+        new_values = [value for value in dict.fromkeys(values) if value not in known]
+        if new_values:
+            self._frame[column] = self._frame[column].cat.add_categories(new_values)
+
+    # Regularly commits changes to the data file, whether it's SQLite or CSV.
+    # In case of CSV, a changed status or quantity cannot be done on a single-row
+    # basis since CSV is simply a flat file, so the whole file gets rewritten,
+    # but only once per flush no matter how many changes piled up.
     # In case of SQLite, everything is a query operation, and we never need
-    # to dump the entire dataframe into the SQLite file.
+    # to dump the entire dataframe into the SQLite file. The queries run inside
+    # one transaction that flush() commits every so often.
+    # New rows never go through here, see flush().
     def commit(self,replace = False,status_replace = False,value=None,company = None,status = None,choice='s'):
         if self.is_csv(self.type):
-            if replace:
-                # Standard entry
-                self.new_entries.to_csv('applications.csv',mode =  'a',index=False,header=False)
-            else:
-                # Updating quantity/status
-                self.dataframe.to_csv('applications.csv',index=False)
+            # Updating quantity/status
+            self._rewrite = True
         else:
+            self.begin()
             # Updating quantity
             if replace:
-                query = "UPDATE Jobs SET Quantity = Quantity + "+str(value)+" WHERE Company = \'"+company+"\' AND Date = \'"+str(self.date)+"\'"
-                self.connection.cursor().execute(query)
-            else:
+                self.connection.execute(self.INCREMENT_QUERY,(int(value),company,self.date_string))
+            elif status_replace:
                 # Updating status
-                if status_replace:
-                    if choice == 's':
-                        query = "UPDATE Jobs SET Status = \'"+status+"\' WHERE Company = \'"+company+"\'"
-                        self.connection.cursor().execute(query)
-                    else:
-                        query = "UPDATE Jobs SET Company = \'"+status+"\' WHERE Company = \'"+company+"\'"
-                        self.connection.cursor().execute(query)
+                if choice == 's':
+                    self.connection.execute(self.STATUS_QUERY,(status,company))
                 else:
-                    # Standard entry
-                    self.new_entries.to_sql("Jobs",self.connection,if_exists='append',index = False)
+                    self.connection.execute(self.RENAME_QUERY,(status,company))
+        self._uncommitted += 1
+        if self._uncommitted >= self.FLUSH_EVERY:
+            self.flush()
+
+    # Opens a transaction on the SQLite connection unless one is already running.
+    def begin(self):
+        if not self.connection.in_transaction:
+            self.connection.execute("BEGIN")
+
+    # Writes the buffered new rows out in one go. CSV files get a plain append
+    # through the open file handle (or the one pending rewrite), SQLite gets a
+    # single executemany, committed together with whatever updates are still
+    # in the open transaction. In memory, the rows are written into the spare
+    # room at the end of the frame. That happens first, so if a row doesn't fit
+    # the frame, nothing has been written to the file yet.
+    def flush(self):
+        import pandas as pd
+        if self._pending:
+            start = self._size
+            self.reserve(len(self._pending))
+            for column,values in zip(self._frame.columns,zip(*self._pending)):
+                if column in ['Company','Status']:
+                    self.add_categories(column,values)
+                self._frame.iloc[start:start+len(values),self._frame.columns.get_loc(column)] = pd.array(values,dtype=self._frame[column].dtype)
+            self._size += len(self._pending)
+            for offset,row in enumerate(self._pending):
+                self._by_company.setdefault(row[0],[]).append(start+offset)
+            # Buffered rows are always today's.
+            self._today_rows.extend(range(start,start+len(self._pending)))
+            if self.is_csv(self.type):
+                if not self._rewrite:
+                    self._csv_writer.writerows((name,status,quantity,self.date_string) for name,status,quantity,_ in self._pending)
+                    self._csv_file.flush()
+            else:
+                self.begin()
+                self.connection.executemany(self.INSERT_QUERY,[(name,status,quantity,self.date_string) for name,status,quantity,_ in self._pending])
+            self._pending = []
+        if self.is_csv(self.type):
+            # The rewrite already includes the rows that were just buffered.
+            if self._rewrite:
+                self.dataframe.to_csv('applications.csv',index=False,date_format="%Y-%m-%d %H:%M:%S")
+                self._rewrite = False
+        elif self.connection.in_transaction:
             self.connection.commit()
-        # In any case, empty the "new entries" section
-        self.new_entries = pd.DataFrame(columns = ['Company','Status','Quantity','Date'])
+        self._uncommitted = 0
+
+    # Flushes and closes the CSV handle that was kept open for the session.
+    def close(self):
+        self.flush()
+        if self.is_csv(self.type):
+            self._csv_file.close()
 
     # Appends new entries to the database.
     def append_entry(self,name,quantity):
-        columns = ['Company','Status','Quantity','Date']
-        found_data = self.dataframe[self.dataframe['Company'] == name]
+        rows = self._by_company.get(name,[])
+        # Rows are kept in file order, so the last one is the most recent.
+        latest_row = rows[-1] if rows else None
+        pending_row = next((row for row in self._pending if row[0] == name),None)
 
         # We only want to aggregate applications done today, everything else
         # is a new entry. If the user wants aggregations done on all data,
         # they can call clean. This is to ensure an honest count of applications.
         # found_data['Date'] = pd.to_datetime(found_data['Date'],format="%d/%m/%Y")
-        if found_data['Quantity'].sum() == 0 or found_data['Date'].max() != self.date:
-            input_row = pd.DataFrame([[name,'Applied',int(quantity),self.date]],columns = columns)
-            self.dataframe = pd.concat([self.dataframe,input_row])
-            self.new_entries = pd.concat([self.new_entries,input_row])
-            self.commit()
+        if pending_row is not None:
+            # Still buffered, so it hasn't hit the file yet.
+            pending_row[2] += int(quantity)
+        elif latest_row is None or self._frame['Date'].to_numpy()[latest_row] != self._today:
+            self._pending.append([name,'Applied',int(quantity),self.date])
+            if len(self._pending) >= self.FLUSH_EVERY:
+                self.flush()
         else:
-            self.dataframe.loc[self.dataframe['Company']==name,'Quantity'] += int(quantity)
+            self._frame.iat[latest_row,self._quantity_col] += int(quantity)
             if self.is_csv(self.type):
                 self.commit()
             else:
                 self.commit(replace=True,value=quantity,company=name)
-        self.jobcount_today += quantity
+        self.jobcount_today += int(quantity)
 
     # Status update
     def update_entry(self,name,status,choice):
+        self.flush()
+        rows = self._by_company.get(name,[])
         if choice == 's':
-            self.dataframe.loc[self.dataframe['Company']==name,'Status'] = status
-        elif choice == 'c':
-            self.dataframe.loc[self.dataframe['Company']==name,'Company'] = status
+            self.add_categories('Status',[status])
+            self._frame.iloc[rows,self._status_col] = status
+        elif choice == 'c' and rows:
+            self.add_categories('Company',[status])
+            self._frame.iloc[rows,self._company_col] = status
+            # The rows now belong to the new name.
+            moved = self._by_company.pop(name)
+            self._by_company[status] = sorted(self._by_company.get(status,[]) + moved)
         self.commit(status_replace=True,company=name,status=status,choice=choice)
     
     # Searching for a company
+    # In case of SQLite, the lookup goes straight through the (Company,Date)
+    # index and never touches pandas.
     def search(self,name):
-        found_data = self.dataframe[self.dataframe['Company'] == name]
+        self.flush()
         print("This is what came up:")
-        print(tabulate(found_data,headers='keys',tablefmt="psql",showindex=False))
+        if self.is_csv(self.type):
+            print_table(self.dataframe.iloc[self._by_company.get(name,[])])
+        else:
+            from tabulate import tabulate
+            cursor = self.connection.execute(self.SEARCH_QUERY,(name,))
+            print(tabulate(cursor.fetchall(),headers=[column[0] for column in cursor.description],tablefmt="psql"))
     
     # How many jobs today, and how many so far?
     def jobcount_check(self):
-        found_data = self.dataframe[self.dataframe['Date'] == self.date]
+        found_data = self.dataframe.iloc[self._today_rows]
         if self.jobcount_today != 0:
-            print(tabulate(found_data,headers='keys',tablefmt="psql",showindex=False))
+            # Buffered rows are today's too, they just haven't been flushed yet.
+            print_table(found_data,self._pending)
         print("Applications today = ",self.jobcount_today)
         print("So far, you have a total of",self.jobcount_today+self.total_jobcount,"applications!")
 
@@ -269,6 +487,16 @@ class Facade:
         self._create_subsystem = Create(type)
         self._update_subsystem = Update(type)
         self._select_subsystem = Select(type)
+        self._closed = False
+
+    # Writes out whatever's still buffered and lets go of the data file.
+    # Safe to call more than once, the main loop calls it on any way out.
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._create_subsystem.database.close()
+        Sqlite3Connector.close_connection()
     
     def operation(self):
         self._select_subsystem.count()
@@ -287,6 +515,8 @@ class Facade:
             if len(choice) > 1:
                 self._create_subsystem.entry(choice,1)
             else:
+                # Don't leave buffered entries behind on the way out.
+                self.close()
                 sys.exit()
 
 
@@ -319,8 +549,12 @@ if(__name__ == '__main__'):
             facade_object.operation(sys.argv[1])
         else:
             facade_object = Facade(sys.argv[1])
-            while True:
-                facade_object.operation()
+            # Ctrl-C, Ctrl-D or a crash still get the buffered changes written.
+            try:
+                while True:
+                    facade_object.operation()
+            finally:
+                facade_object.close()
     else:
         AdminFacade().operation("invalid")
         